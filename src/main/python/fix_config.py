@@ -1,22 +1,49 @@
 """
 Program that fixes all JMatrix configurations.
 """
+from __future__ import annotations
+
 __author__ = 'Ryuu Mitsuki'
 __all__    = ['FixConfig']
 
 import os
 import sys
+import stat
 import json
 import re
-from typing import Union, Optional
+from typing import TYPE_CHECKING
 from utils import Utils, FileUtils
 
-try:
-    from bs4 import BeautifulSoup
-    from bs4.formatter import XMLFormatter
-except ModuleNotFoundError as bs_not_found:
-    Utils.info_msg('Please install all the requirements first.' + os.linesep)
-    Utils.raise_error(bs_not_found, -1, file=__file__)
+# Only needed for type hints, which are no longer evaluated at runtime.
+# lxml itself is imported by `FixConfig.__get_pom_data`, only when 'pom.xml' is parsed.
+if TYPE_CHECKING:
+    from typing import Union, Optional
+    from lxml import etree
+
+
+# Matches the `${property.name}` placeholders in configuration templates
+_PLACEHOLDER_RE = re.compile(r'\$\{([\w.-]+)\}')
+
+# Elements of 'pom.xml' that are reported while parsing, in any namespace
+_POM_TAGS = ('{*}properties', '{*}groupId', '{*}artifactId',)
+
+# Matches the version line in 'Makefile', e.g. `VERSION := 1.0.0`
+_MAKEFILE_VERSION_RE = re.compile(r'^version\s*[:=|=]+\s*(.*?)\s*$')
+
+
+def _escape_xml(text: str) -> str:
+    """
+    Escapes the XML special characters of `text`, double quotes included,
+      so it can be placed in both element text and attribute values.
+    """
+    return text.replace('&', '&amp;').replace('<', '&lt;') \
+               .replace('>', '&gt;').replace('"', '&quot;')
+
+
+def _noop(*_args, **_kwargs) -> None:
+    """
+    Does nothing, used in place of the logger when verbose output is disabled.
+    """
 
 
 class FixConfig:
@@ -28,14 +55,42 @@ class FixConfig:
         - Makefile
         - config.xml
     '''
-    __SOURCES_PATH:   str = (os.sep).join(['src', 'main']) + os.sep
-    __TARGET_PATH:    str = f'target{os.sep}'
-    __CLASSES_PATH:   str = __TARGET_PATH + f'classes{os.sep}'
-    __CACHE_PATH:     str = __TARGET_PATH + f'.cache{os.sep}'
-    __RESOURCES_PATH: str = __SOURCES_PATH + f'resources{os.sep}'
-
-    __TARGET_FILES: tuple = ('config.xml', 'Makefile', 'MANIFEST.MF',)
-    __verbose:      bool  = False
+    # Directory paths always end with path separator
+    __SOURCES_PATH:   str = os.path.join('src', 'main', '')
+    __TARGET_PATH:    str = os.path.join('target', '')
+    __CLASSES_PATH:   str = os.path.join(__TARGET_PATH, 'classes', '')
+    __CACHE_PATH:     str = os.path.join(__TARGET_PATH, '.cache', '')
+    __RESOURCES_PATH: str = os.path.join(__SOURCES_PATH, 'resources', '')
+
+    __CONFIG_CACHE:      str = 'config.json'
+    __CONFIG_CACHE_PATH: str = os.path.join(__CACHE_PATH, __CONFIG_CACHE)
+
+    __TARGET_FILES:       tuple = ('config.xml', 'Makefile', 'MANIFEST.MF',)
+    __TARGET_FILES_LOWER: tuple = tuple(target.lower() for target in __TARGET_FILES)
+    __verbose:            bool  = False
+
+    # Source file of each target file, keyed by the lowercased file name
+    __SOURCE_PATHS: dict = {
+        __TARGET_FILES_LOWER[0]: os.path.join(__RESOURCES_PATH, 'configuration', __TARGET_FILES[0]),
+        __TARGET_FILES_LOWER[1]: __TARGET_FILES[1],
+        __TARGET_FILES_LOWER[2]: os.path.join('META-INF', __TARGET_FILES[2])
+    }
+
+    # Output directory of each target file, keyed by the lowercased file name
+    __OUTPUT_PATHS: dict = {
+        __TARGET_FILES_LOWER[0]: os.path.join(__CLASSES_PATH, 'configuration', ''),
+        __TARGET_FILES_LOWER[1]: os.path.join('.', ''),
+        __TARGET_FILES_LOWER[2]: os.path.join('META-INF', '')
+    }
+
+    # Path to the generated 'config.xml'
+    __CONFIG_XML_OUTPUT: str = os.path.join(
+        __OUTPUT_PATHS[__TARGET_FILES_LOWER[0]], __TARGET_FILES[0]
+    )
+
+    # Temporary file of the generated 'config.xml', kept out of 'target/classes/'
+    # so an interrupted run never leaves it to be packaged into the JAR
+    __CONFIG_XML_TMP: str = os.path.join(__CACHE_PATH, __TARGET_FILES[0] + '.tmp')
 
     def __init__(self, verbose: bool = False) -> None:
         """
@@ -52,6 +107,13 @@ class FixConfig:
             None
         """
         self.__verbose = verbose
+        self.__log = Utils.info_msg if verbose else _noop
+        self.__config_data: Optional[dict] = None
+        self.__handlers: dict = {
+            self.__TARGET_FILES_LOWER[0]: self.__fix_config_xml,
+            self.__TARGET_FILES_LOWER[1]: self.__fix_makefile,
+            self.__TARGET_FILES_LOWER[2]: self.__fix_manifest
+        }
 
 
     def run(self) -> None:
@@ -67,28 +129,27 @@ class FixConfig:
         Raises:
             None
         """
-        self.__get_pom_data(cache=True, out='config.json')
+        # Only parse 'pom.xml' if it has changed since the cache was created
+        if self.__is_cache_fresh(self.__CONFIG_CACHE):
+            self.__log('Cached configuration data is up-to-date.')
+        else:
+            self.__get_pom_data(cache=True, out=self.__CONFIG_CACHE)
+
+        # Reuse the data parsed from 'pom.xml' in this run if any,
+        # otherwise load the cached configuration data once for all target files
+        config_data: dict = self.__config_data or self.__get_cache(self.__CONFIG_CACHE_PATH)
+
+        # All target files get the same version, so it is derived only once
+        fixed_version: str = self.__get_version(config_data=config_data, fixed_only=True)
 
         # [config.xml]
-        self.__fix_configuration(
-            None,
-            cached=f'{self.__CACHE_PATH}config.json',
-            target='config.xml'
-        )
+        self.__fix_configuration(config_data, target='config.xml', fixed_version=fixed_version)
 
         # [Makefile]
-        self.__fix_configuration(
-            None,
-            cached=f'{self.__CACHE_PATH}config.json',
-            target='makefile'
-        )
+        self.__fix_configuration(config_data, target='makefile', fixed_version=fixed_version)
 
         # [MANIFEST.MF]
-        self.__fix_configuration(
-            None,
-            cached=f'{self.__CACHE_PATH}config.json',
-            target='manifest.mf'
-        )
+        self.__fix_configuration(config_data, target='manifest.mf', fixed_version=fixed_version)
 
 
     def __create_cache(self,
@@ -125,11 +186,9 @@ class FixConfig:
                   and cannot be accessed by program.
 
         """
-        FileUtils.check_directory(self.__CACHE_PATH, verbose=self.__verbose)
-
         if self.__verbose:
             Utils.pr_banner('CREATE CACHE')
-            Utils.info_msg(f'Creating cache for id:<{id(data)}> to "{out}"...')
+            Utils.info_msg(f'Creating cache to "{out}"...')
 
         try:
             if out is None:
@@ -138,36 +197,44 @@ class FixConfig:
         except RuntimeError as run_err:
             Utils.raise_error(run_err, -1, file=__file__)
 
+        cache_path: str = self.__CACHE_PATH + out
+        tmp_path:   str = cache_path + '.tmp'
+
+        # The cache is written to a temporary file first and then moved
+        # to its place, so an interrupted write never leaves a broken cache
         if isinstance(data, str):
             try:
-                if self.__verbose:
-                    Utils.info_msg(os.linesep + \
-                        f'Writing "{data.strip()}" -> \'{out}\'...')
+                self.__log(os.linesep + f'Writing "{data.strip()}" -> \'{out}\'...')
 
-                with open(self.__CACHE_PATH + out, 'w', encoding='utf-8') as cache:
+                with open(tmp_path, 'w', encoding='utf-8') as cache:
                     cache.write(data)
+                os.replace(tmp_path, cache_path)
             except PermissionError as perm_err:
                 Utils.raise_error(perm_err, -1, file=__file__)
 
             if self.__verbose:
                 print()
-                Utils.info_msg(f'Cache created, saved in "{self.__CACHE_PATH}{out}".')
+                Utils.info_msg(f'Cache created, saved in "{cache_path}".')
 
         elif isinstance(data, dict):
             try:
-                with open(self.__CACHE_PATH + out, 'w', encoding='utf-8') as cache:
-                    cache.write(json.dumps(data, indent=indent) + os.linesep)
+                with open(tmp_path, 'w', encoding='utf-8') as cache:
+                    json.dump(data, cache, indent=indent)
+                    cache.write(os.linesep)
+                os.replace(tmp_path, cache_path)
 
                 if self.__verbose:
                     print()
-                    for key, val in data.items():
-                        Utils.info_msg(f'Writing ("{key}", "{val}") -> \'{out}\'...')
+                    Utils.info_msgs(
+                        f'Writing ("{key}", "{val}") -> \'{out}\'...'
+                            for key, val in data.items()
+                    )
             except PermissionError as perm_err:
                 Utils.raise_error(perm_err, -1, file=__file__)
 
             if self.__verbose:
                 print()
-                Utils.info_msg(f'Cache created, saved in "{self.__CACHE_PATH}{out}".')
+                Utils.info_msg(f'Cache created, saved in "{cache_path}".')
                 Utils.pr_banner('(END) CREATE CACHE', newline=1)
 
 
@@ -190,52 +257,89 @@ class FixConfig:
                 If the given cache path is exist but a directory.
         """
         cache_data: dict = { }
+        cache_stat: os.stat_result = None
 
+        # Single stat call for both existence and file type checks
         try:
-            if not os.path.exists(cache_path):
+            cache_stat = os.stat(cache_path)
+        except OSError:
+            pass
+
+        try:
+            if cache_stat is None:
                 msg = 'Path to cached configuration data does not exist'
                 raise FileNotFoundError(msg)
-            if os.path.exists(cache_path) and not os.path.isfile(cache_path):
+            if not stat.S_ISREG(cache_stat.st_mode):
                 msg = 'Path to cached configuration data is a directory'
                 raise IsADirectoryError(msg)
 
-            cache_data = json.loads(FileUtils.read_file(
-                cache_path, _list=False,
-                verbose=self.__verbose
-            ))
+            self.__log(f'Retrieving cached configuration data from "{cache_path}"...')
+
+            # Decode the JSON directly from the file
+            with open(cache_path, 'r', encoding='utf-8') as cache:
+                cache_data = json.load(cache)
 
         except FileNotFoundError as nf_err:
             Utils.raise_error(nf_err, 2, file=__file__)
         except IsADirectoryError as dir_err:
             Utils.raise_error(dir_err, 1, file=__file__)
+        except PermissionError as perm_err:
+            Utils.raise_error(perm_err, -1, file=__file__)
 
         return cache_data
 
 
-    def __get_output_path(self, target: str) -> str:
+    def __get_pom_stamp(self) -> Optional[str]:
+        """
+        Gets the stamp of 'pom.xml', made of its modification time
+          (in nanoseconds) and its size.
+
+        Parameters:
+            None
+
+        Returns:
+            A string representing the stamp of 'pom.xml' with format
+              'mtime_ns:size', or None if 'pom.xml' cannot be accessed.
+
+        Raises:
+            None
+        """
+        try:
+            pom_stat: os.stat_result = os.stat('pom.xml')
+        except OSError:
+            return None
+
+        return f'{pom_stat.st_mtime_ns}:{pom_stat.st_size}'
+
+
+    def __is_cache_fresh(self, out: str) -> bool:
         """
-        Gets the correct output path for targeted file.
+        Checks whether the cached configuration data is up-to-date with 'pom.xml',
+          by comparing the current stamp of 'pom.xml' with the stamp
+          stored next to the cache when it was created.
 
         Parameters:
-            - target: str
-                The targeted file to gets it's correct output path.
+            - out: str
+                The file name of the cached configuration data.
 
         Returns:
-            A string representing output path for targeted file.
+            True if the cache exists and 'pom.xml' has not changed since
+              the cache was created, otherwise False.
 
         Raises:
             None
         """
-        path: str = None
+        pom_stamp:  str = self.__get_pom_stamp()
+        cache_path: str = self.__CACHE_PATH + out
 
-        if target.lower() == self.__TARGET_FILES[0]:
-            path = self.__CLASSES_PATH + f'configuration{os.sep}'
-        if target.lower() == self.__TARGET_FILES[1].lower():
-            path = '.' + os.sep
-        if target.lower() == self.__TARGET_FILES[2].lower():
-            path = 'META-INF' + os.sep
+        if pom_stamp is None or not os.path.isfile(cache_path):
+            return False
 
-        return path
+        try:
+            with open(cache_path + '.stamp', 'r', encoding='utf-8') as stamp:
+                return stamp.read().strip() == pom_stamp
+        except OSError:
+            return False
 
 
     def __get_version(self, list_data: list = None, **kwargs) -> Union[tuple, str]:
@@ -250,12 +354,17 @@ class FixConfig:
             - **kwargs
                 Additional keyword arguments.
 
-                + regex: str
-                    A regex pattern to match against the list elements.
+                + regex: Union[str, re.Pattern]
+                    A regex pattern or a compiled pattern to match
+                      against the list elements.
 
                 + config_data: dict
                     Dictionary containing the configuration data and version.
 
+                + fixed_version: str (optional)
+                    The already derived fixed version string,
+                      if given, `config_data` is not used.
+
                 + fixed_only: bool (optional)
                     If True, returns only the fixed version string.
 
@@ -268,11 +377,15 @@ class FixConfig:
         Raises:
             None
         """
-        config_data:   dict = kwargs.get('config_data', {})
-        fixed_version: str  = config_data.get('package.version.core', 'null')
-        if config_data.get('package.releaseType', 'null').lower() not in ('release', 'stable'):
-            fixed_version += '-' + config_data.get('package.releaseType', 'null') + \
-                             '.' + config_data.get('package.betaNum', 'null')
+        fixed_version: str = kwargs.get('fixed_version')
+
+        if fixed_version is None:
+            config_data:  dict = kwargs.get('config_data', {})
+            release_type: str  = config_data.get('package.releaseType', 'null')
+            fixed_version = config_data.get('package.version.core', 'null')
+            if release_type.lower() not in ('release', 'stable'):
+                beta_num: str = config_data.get('package.betaNum', 'null')
+                fixed_version = f'{fixed_version}-{release_type}.{beta_num}'
 
         if kwargs.get('fixed_only', False):
             return fixed_version
@@ -283,12 +396,13 @@ class FixConfig:
                 1, file=__file__
             )
 
-        regex:         str  = kwargs.get('regex')
-        new_version:   str  = None
-        index:         int  = -99
+        # Compiled only once, already compiled patterns are returned as is
+        regex:         re.Pattern = re.compile(kwargs.get('regex'))
+        new_version:   str        = None
+        index:         int        = -99
 
         for i, __data in enumerate(list_data):
-            match = re.compile(regex).match(__data.lower().strip())
+            match = regex.match(__data.lower().strip())
             if match:
                 index = i
                 new_version = ' '.join(
@@ -318,52 +432,68 @@ class FixConfig:
         Raises:
             None
         """
-        def filter_data(bs_data: BeautifulSoup) -> dict:
-            def filter_group_id(data: dict) -> None:
-                for elm in bs_data.find_all('groupId'):
-                    if elm.text.strip().split('.')[-1] not in data['author.name'].lower():
+        def local_name(element: etree._Element) -> str:
+            # Strip the namespace, e.g. '{http://...}groupId' -> 'groupId'
+            return element.tag.rpartition('}')[2]
+
+        # --------------------------------------------------- #
+
+        def filter_data(pom_file: str) -> dict:
+            def filter_group_id(data: dict, group_ids: list) -> None:
+                for group_id in group_ids:
+                    if group_id.split('.')[-1] not in data['author.name'].lower():
                         continue
-                    data['project.' + elm.name] = elm.text.strip()
+                    data['project.groupId'] = group_id
                     if self.__verbose:
-                        print(' ' * 4 + f'<{elm.name}>', elm.text.strip(), f'</{elm.name}>')
+                        shown.append(f'    <groupId> {group_id} </groupId>')
 
             # --------------------------------------------------- #
 
-            def filter_artifact_id(data: dict) -> None:
-                for elm in bs_data.find_all('artifactId'):
-                    if not elm.text.strip().split('-')[0] == data['package.name'].lower():
+            def filter_artifact_id(data: dict, artifact_ids: list) -> None:
+                for artifact_id in artifact_ids:
+                    if not artifact_id.split('-')[0] == data['package.name'].lower():
                         continue
-                    data['project.' + elm.name] = elm.text.strip()
+                    data['project.artifactId'] = artifact_id
                     if self.__verbose:
-                        print(' ' * 4 + f'<{elm.name}>', elm.text.strip(), f'</{elm.name}>')
+                        shown.append(f'    <artifactId> {artifact_id} </artifactId>')
 
             # --------------------------------------------------- #
 
-            data: dict = { }
+            data:         dict = { }
+            group_ids:    list = [ ]
+            artifact_ids: list = [ ]
+            shown:        list = [ ]  # verbose output, printed at once
 
             if self.__verbose:
                 Utils.info_msg('Filtering contents...')
                 print(os.linesep + '>> ' + '-' * 50 + ' <<')
                 print(os.linesep + '<contents>')
 
-            for element in bs_data.find_all():
-                for child in element.find_all():
-                    if child.name != 'properties':
-                        continue
-                    for child_1 in child.find_all():
-                        if child_1.name.startswith('project'):
-                            continue
-                        data[child_1.name] = child_1.text.strip()
-                        if self.__verbose:
-                            print(' ' * 4 + f'<{child_1.name}>',
-                                child_1.text.strip(), f'</{child_1.name}>'
-                            )
+            # Stream the file in a single pass, only the needed elements
+            # are reported by the parser and cleared once processed
+            for elm in Utils.iter_xml(pom_file, tag=_POM_TAGS):
+                name: str = local_name(elm)
 
-            filter_group_id(data)
-            filter_artifact_id(data)
+                if name == 'properties':
+                    for child in elm:
+                        # Skip comments and processing instructions
+                        if not isinstance(child.tag, str):
+                            continue
+                        name = local_name(child)
+                        if not name.startswith('project'):
+                            data[name] = (child.text or '').strip()
+                            if self.__verbose:
+                                shown.append(f'    <{name}> {data[name]} </{name}>')
+                elif name == 'groupId':
+                    group_ids.append((elm.text or '').strip())
+                elif name == 'artifactId':
+                    artifact_ids.append((elm.text or '').strip())
+
+            filter_group_id(data, group_ids)
+            filter_artifact_id(data, artifact_ids)
 
             if self.__verbose:
-                print('</contents>' + os.linesep)
+                print(os.linesep.join(shown + ['</contents>']) + os.linesep)
                 print('>> ' + '-' * 50 + ' <<' + os.linesep)
                 Utils.info_msg('All contents filtered.')
 
@@ -372,21 +502,39 @@ class FixConfig:
         # ------------------------------------------------------- #
 
         if out is None or out == '':
-            out = 'config.json'
+            out = self.__CONFIG_CACHE
 
         if self.__verbose:
             Utils.pr_banner('GET CONFIG DATA', newline=1)
 
         FileUtils.check_file('pom.xml', verbose=self.__verbose)
-        bs_data: BeautifulSoup = Utils.convert_to_bs(
-            'pom.xml',
-            verbose=self.__verbose
-        )
 
-        config_data: dict = filter_data(bs_data)
+        # Taken before parsing, so changes made while parsing invalidate the cache
+        pom_stamp: str = self.__get_pom_stamp()
+
+        config_data: dict = None
+
+        # Imported here, runs with an up-to-date cache never parse 'pom.xml'
+        try:
+            from lxml import etree  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        except ModuleNotFoundError as lxml_not_found:
+            Utils.info_msg('Please install all the requirements first.' + os.linesep)
+            Utils.raise_error(lxml_not_found, -1, file=__file__)
+
+        try:
+            config_data = filter_data('pom.xml')
+        except etree.XMLSyntaxError as xml_err:
+            Utils.raise_error(xml_err, 1, file=__file__)
+
+        self.__log('Contents of "pom.xml" parsed.')
+
+        # Kept for the rest of this run, so it does not have to be read back from the cache
+        self.__config_data = config_data
 
         if cache:
+            FileUtils.check_directory(self.__CACHE_PATH, verbose=self.__verbose)
             self.__create_cache(config_data, indent=4, out=out)
+            self.__create_cache(pom_stamp, out=out + '.stamp')
             config_data = None
 
         if self.__verbose:
@@ -396,7 +544,8 @@ class FixConfig:
 
 
     def __fix_configuration(self,
-            data: dict, cached: str = None, target: str = None) -> None:
+            data: dict, cached: str = None, target: str = None,
+            fixed_version: str = None) -> None:
         """
         Fix the configurations of specified target file.
 
@@ -410,6 +559,10 @@ class FixConfig:
             - target: str (default = None)
                 The target file that want to fix it's configurations.
 
+            - fixed_version: str (default = None)
+                The fixed version string, if None it will be derived from
+                  the configuration data.
+
         Returns:
             None
 
@@ -421,163 +574,201 @@ class FixConfig:
             - FileNotFoundError
                 If file path to cached configuration data does not exist.
         """
-        target_path: str = None
-        target_data: Union[list, dict] = None
-
         try:
             if not data and not cached:
                 raise RuntimeError(
                     'Given config data is empty, please specify path to cached config'
                 )
-            if target.lower() is None or \
-                    not target in [
-                        target_file.lower()
-                        for target_file in self.__TARGET_FILES
-                    ]:
+            target = target.lower() if target else None
+            if target not in self.__TARGET_FILES_LOWER:
                 raise RuntimeError('Please specify the target file')
-
-            if target.lower() in [
-                    target_file.lower()
-                    for target_file in self.__TARGET_FILES
-                ]:
-                # config.xml
-                if target.lower() == self.__TARGET_FILES[0]:
-                    target_path = self.__RESOURCES_PATH + \
-                        f'configuration{os.sep}' + self.__TARGET_FILES[0]
-
-                # Makefile
-                elif target.lower() == self.__TARGET_FILES[1].lower():
-                    target_path = self.__TARGET_FILES[1]
-
-                # MANIFEST.MF
-                elif target.lower() == self.__TARGET_FILES[2].lower():
-                    target_path = f'META-INF{os.sep}' + self.__TARGET_FILES[2]
-
         except RuntimeError as run_err:
             Utils.raise_error(run_err, -1, file=__file__)
 
+        target_path: str = self.__SOURCE_PATHS[target]
+
         if self.__verbose:
             Utils.pr_banner('FIX CONFIGURATION')
             print(f'>>>>> FILE: "{target_path}"')
 
-        if target.lower() != self.__TARGET_FILES[1].lower():
+        # The Makefile is written in place, in the current directory
+        if target != self.__TARGET_FILES_LOWER[1]:
             FileUtils.check_directory(
-                self.__get_output_path(target), verbose=self.__verbose
+                self.__OUTPUT_PATHS[target], verbose=self.__verbose
             )
 
         data = self.__get_cache(cached) if not data else data
+        if fixed_version is None:
+            fixed_version = self.__get_version(config_data=data, fixed_only=True)
 
-        # Check the target file
-        # [config.xml]
-        if target.lower() == self.__TARGET_FILES[0]:
-            bs_data = repr(Utils.convert_to_bs(target_path, verbose=self.__verbose))
-
-            target_data: dict = { }
-            target_value: list = re.compile(r"\$\{([\w.-]+)\}").findall(bs_data)
-
-            for i, _ in enumerate(target_value):
-                target_data[target_value[i]] = data[target_value[i]]
-
-            for key, val in target_data.items():
-                bs_data = re.sub(fr'\${{{key}}}', val, bs_data)
-
-            bs_data = BeautifulSoup(bs_data, 'xml').prettify(
-                formatter=XMLFormatter(indent=4)
-            ).split(os.linesep)
-            bs_data[0] += os.linesep
-
-            fixed_data: list = [ ]
-            i: int = 0
-            for idx, element in enumerate(bs_data):
-                if element.startswith(('<?', '<conf', '</conf')):
-                    continue
-                if not element.strip().startswith('<'):
-                    fixed_data.append(element.strip())
-                elif fixed_data and element.strip().startswith('</'):
-                    fixed_data[-1] += element.strip()
-                    bs_data[idx - 2] += fixed_data[i]
-                    bs_data[idx] = None
-                    bs_data[idx - 1] = None
-                    i += 1
-
-            bs_data = [__data for __data in bs_data if __data]
-
-            FileUtils.write_to_file(
-                self.__get_output_path(target) + 'config.xml',
-                contents=bs_data, verbose=self.__verbose
-            )
+        # Fix the target file with its own handler
+        self.__handlers[target](data, target_path, fixed_version)
 
-        # [Makefile]
-        elif target.lower() == self.__TARGET_FILES[1].lower():
-            target_data: list = FileUtils.read_file(
-                target_path, verbose=self.__verbose
-            )
+        if self.__verbose:
+            Utils.pr_banner('(END) FIX CONFIGURATION', newline=1)
 
-            # Get the version number using regex
-            old_version, new_version, idx = self.__get_version(
-                list_data=target_data,
-                regex=r'^version\s*[:=|=]+\s*(.*?)\s*$',
-                config_data=data
-            )
 
-            if old_version == new_version:
-                if self.__verbose:
-                    Utils.info_msg(f'Version in "{target_path}" is up-to-date')
-                return
-
-            target_data[idx] = new_version + os.linesep
-            FileUtils.write_to_file(
-                target_path, contents=target_data,
-                newline=False,
-                verbose=self.__verbose
-            )
+    def __fix_config_xml(self, data: dict, target_path: str, _fixed_version: str) -> None:
+        """
+        Fix the configurations of 'config.xml' file
+          and write it to the output directory.
 
-            # After fix version in Makefile, this program will exit immediately.
-            # If this program exit, it will send exit signal to Makefile.
-            # In that way, Makefile will recognize the signal,
-            #   and then will be terminated immediately.
-            print(os.linesep * 2 + r'/!\ WARNING' + os.linesep + '-' * 70)
-            Utils.info_msg(f'Version in "{target_path}" have been fixed, need restart!')
-            print(
-                f'Old version: "{old_version.split()[-1].strip()}"' + os.linesep + \
-                f'New version: "{new_version.split()[-1].strip()}"' + os.linesep + \
-                '-' * 70
-            )
-            sys.exit(-1)  # this should not be zero
+        Parameters:
+            - data: dict
+                The dictionary contains new configuration data.
 
-        # [MANIFEST.MF]
-        elif target.lower() == self.__TARGET_FILES[2].lower():
-            contents: str = f'''
-            Manifest-Version: 1.2
-            Built-By: {data.get("author.name")}
-            License-File: LICENSE
-            Main-Class: {data.get("package.mainClass")}
-            Program-Name: {data.get("package.name")}
-            Program-Version: v%s
-            ''' % self.__get_version(config_data=data, fixed_only=True)
-            contents = [ct.strip() for ct in contents.splitlines() if ct][:-1]
-
-            manifest_contents: list = FileUtils.read_file(
-                target_path, verbose=self.__verbose
-            )
-            manifest_contents = [mf.strip() for mf in manifest_contents]
+            - target_path: str
+                The path to the 'config.xml' template file.
 
-            if contents == manifest_contents:
-                if self.__verbose:
-                    Utils.info_msg(f'File "{self.__TARGET_FILES[2]}" is up-to-date')
-                return
+            - _fixed_version: str
+                Unused, the version in 'config.xml' is filled from its placeholders.
 
-            FileUtils.write_to_file(
-                target_path, contents=contents,
-                verbose=self.__verbose
-            )
+        Returns:
+            None
 
-            if self.__verbose:
-                Utils.info_msg(f'File "{self.__TARGET_FILES[2]}" updated.')
+        Raises:
+            None
+        """
+        def substitute(match: re.Match) -> str:
+            # Unknown placeholders are left untouched
+            if match.group(1) not in data:
+                return match.group(0)
+            return _escape_xml(data[match.group(1)])
+
+        # -------------------------------------------------- #
+
+        # The template is already well-formed and indented, so the placeholders
+        # are replaced directly in its text instead of parsing and re-serializing it
+        xml_data: str = _PLACEHOLDER_RE.sub(
+            substitute,
+            FileUtils.read_file(target_path, _list=False, verbose=self.__verbose)
+        )
 
+        output_path: str = self.__CONFIG_XML_OUTPUT
+        tmp_path:    str = self.__CONFIG_XML_TMP
 
-        if self.__verbose:
-            Utils.pr_banner('(END) FIX CONFIGURATION', newline=1)
+        # Leave the output file untouched if it already has the same contents
+        try:
+            with open(output_path, 'r', encoding='utf-8') as config:
+                if config.read() == xml_data:
+                    self.__log(f'File "{self.__TARGET_FILES[0]}" is up-to-date')
+                    return
+        except OSError:
+            pass
+
+        # Written to a temporary file first and then moved to its place,
+        # so concurrent builds never read a partially written file
+        FileUtils.write_to_file(
+            tmp_path, contents=xml_data,
+            newline=False, verbose=self.__verbose
+        )
+
+        try:
+            os.replace(tmp_path, output_path)
+        except PermissionError as perm_err:
+            Utils.raise_error(perm_err, -1, file=__file__)
+
+
+    def __fix_makefile(self, _data: dict, target_path: str, fixed_version: str) -> None:
+        """
+        Fix the version in 'Makefile'.
+        If the version has been fixed, the program exits immediately.
+
+        Parameters:
+            - _data: dict
+                Unused, only the version is written to 'Makefile'.
+
+            - target_path: str
+                The path to the Makefile to be fixed.
+
+            - fixed_version: str
+                The new version string.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        target_data: list = FileUtils.read_file(
+            target_path, verbose=self.__verbose
+        )
+
+        # Get the version number using regex
+        old_version, new_version, idx = self.__get_version(
+            list_data=target_data,
+            regex=_MAKEFILE_VERSION_RE,
+            fixed_version=fixed_version
+        )
+
+        if old_version == new_version:
+            self.__log(f'Version in "{target_path}" is up-to-date')
+            return
+
+        target_data[idx] = new_version + os.linesep
+        FileUtils.write_to_file(
+            target_path, contents=target_data,
+            newline=False,
+            verbose=self.__verbose
+        )
+
+        # After fix version in Makefile, this program will exit immediately.
+        # If this program exit, it will send exit signal to Makefile.
+        # In that way, Makefile will recognize the signal,
+        #   and then will be terminated immediately.
+        print(os.linesep * 2 + r'/!\ WARNING' + os.linesep + '-' * 70)
+        Utils.info_msg(f'Version in "{target_path}" have been fixed, need restart!')
+        print(
+            f'Old version: "{old_version.split()[-1].strip()}"' + os.linesep + \
+            f'New version: "{new_version.split()[-1].strip()}"' + os.linesep + \
+            '-' * 70
+        )
+        sys.exit(-1)  # this should not be zero
+
+
+    def __fix_manifest(self, data: dict, target_path: str, fixed_version: str) -> None:
+        """
+        Fix the configurations of 'MANIFEST.MF' file.
+
+        Parameters:
+            - data: dict
+                The dictionary contains new configuration data.
+
+            - target_path: str
+                The path to the 'MANIFEST.MF' file to be fixed.
+
+            - fixed_version: str
+                The new version string.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        contents: list = [
+            'Manifest-Version: 1.2',
+            f'Built-By: {data.get("author.name")}',
+            'License-File: LICENSE',
+            f'Main-Class: {data.get("package.mainClass")}',
+            f'Program-Name: {data.get("package.name")}',
+            f'Program-Version: v{fixed_version}'
+        ]
+
+        manifest_contents: list = [
+            mf.strip() for mf in FileUtils.read_file(target_path, verbose=self.__verbose)
+        ]
+
+        if contents == manifest_contents:
+            self.__log(f'File "{self.__TARGET_FILES[2]}" is up-to-date')
+            return
+
+        FileUtils.write_to_file(
+            target_path, contents=contents,
+            verbose=self.__verbose
+        )
+
+        self.__log(f'File "{self.__TARGET_FILES[2]}" updated.')
 
 
     __all__ = ['run']
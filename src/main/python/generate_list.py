@@ -1,17 +1,46 @@
 """
 Program that generates the list of source files or class files.
 """
+from __future__ import annotations
+
 __author__ = 'Ryuu Mitsuki'
 __all__    = ['GenerateList']
 
 import os
 import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
 from utils import Utils, FileUtils
 
+# Only needed for type hints, which are no longer evaluated at runtime
+if TYPE_CHECKING:
+    from typing import Iterator
+
+# Maximum number of threads used to walk a directory tree
+_MAX_WORKERS: int = min(8, os.cpu_count() or 1)
+
+# Minimum number of pending directories before the walk uses threads,
+# smaller trees are walked faster than the threads can be started
+_MIN_PARALLEL_DIRS: int = 16
+
+# Command line options, mapped to the type of list they generate
+_LIST_OPTS: dict = {
+    'src': 'source_list', 'source': 'source_list',
+    'cls': 'output_list', 'class': 'output_list'
+}
+
+# Paths are handled as bytes, the way the file system returns them
+_SEP:     bytes = os.fsencode(os.sep)
+_LINESEP: bytes = os.fsencode(os.linesep)
+
+# Flags for writing the list files, `O_BINARY` prevents newline translation on Windows
+_WRITE_FLAGS: int = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | \
+                    getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+
 class GenerateList:
     """
     This class provides methods that generates list of source files and class files.
-    Currently only works on Linux/Unix system, Windows user need to install MinGW and Git Bash.
 
     Working directory:
         : 'src/main/java/' - For searching all of source files (*.java).
@@ -26,24 +55,12 @@ class GenerateList:
         ('output'): ('/').join(['target', 'generated-list', 'outputFiles.lst'])
     }
 
+    # Roots of the walked directories, encoded once like the walked paths
+    __SOURCE_ROOT:   bytes = os.fsencode(__PATH['target_path'])
+    __SOURCE_PREFIX: bytes = os.path.join(__SOURCE_ROOT, b'')
+    __CLASS_ROOT:    bytes = os.fsencode(__PATH['class_path'])
+
     __verbose: bool = False
-    __command: dict = {
-        'unix': {
-            'source':
-                f'find {__PATH["target_path"]} -type f -name "*.java" > {__PATH["source"]}',
-
-            'output':
-                f'find {__PATH["class_path"]} -type f -name "*.class" > {__PATH["output"]}'
-        },
-
-        'windows': {
-            'source':
-                f'dir "{__PATH["target_path"]}" /b /s *.java > {__PATH["source"]}',
-
-            'output':
-                f'dir "{__PATH["class_path"]}" /b /s *.class > {__PATH["output"]}'
-        }
-    }
 
 
     def __init__(self, verbose: bool = False) -> None:
@@ -102,17 +119,159 @@ class GenerateList:
         elif generate in ('output', 'output_list'):
             self.__generate_output_list()
         else:
+            Utils.raise_error(
+                ValueError(f'Unknown list type: "{generate}"'),
+                -1, file=__file__
+            )
+
+
+    def __walk(self, root: bytes, suffix: bytes, prefix: bytes = b'') -> Iterator[bytes]:
+        """
+        Walks the `root` directory recursively and yields the path of
+          every regular file whose name ends with `suffix`.
+        Symbolic links are not followed, same as `find -type f`.
+
+        Parameters:
+            - root: bytes
+                The directory to walk.
+
+            - suffix: bytes
+                The file name suffix to match, e.g. b'.java'.
+
+            - prefix: bytes (default = b'')
+                The path of `root` relative to the top walked directory,
+                  with a trailing separator. Used while recursing.
+
+        Returns:
+            An iterator of the matched file paths,
+              relative to the top walked directory.
+
+        Raises:
+            - OSError
+                If a directory cannot be read.
+        """
+        # The name is checked before the file type, and the type is taken
+        # from the directory entry itself, so no extra stat is needed
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and entry.is_file(follow_symlinks=False):
+                    yield prefix + entry.name
+                elif entry.is_dir(follow_symlinks=False):
+                    yield from self.__walk(entry.path, suffix, prefix + entry.name + _SEP)
+
+
+    def __collect(self, root: bytes, suffix: bytes) -> list:
+        """
+        Collects the path of every regular file under the `root` directory
+          whose name ends with `suffix`, in no particular order.
+        Small trees are walked in the calling thread. Once enough directories
+          are pending, they are walked in parallel by a pool of threads.
+
+        Parameters:
+            - root: bytes
+                The directory to walk.
+
+            - suffix: bytes
+                The file name suffix to match, e.g. b'.java'.
+
+        Returns:
+            A list of the matched file paths as bytes, relative to `root`.
+
+        Raises:
+            - OSError
+                If a directory cannot be read.
+        """
+        files:   list = [ ]
+        subdirs: list = [ (root, b'') ]  # pairs of directory path and relative prefix
+
+        # Walk the tree here until it is wide enough to be worth splitting,
+        # a small tree is walked completely without starting any thread
+        while subdirs and (len(subdirs) < _MIN_PARALLEL_DIRS or _MAX_WORKERS == 1):
+            dirpath, prefix = subdirs.pop()
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.name.endswith(suffix) and entry.is_file(follow_symlinks=False):
+                        files.append(prefix + entry.name)
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, prefix + entry.name + _SEP))
+
+        if subdirs:
+            # Threads release the GIL while waiting on the filesystem
+            with ThreadPoolExecutor(max_workers=min(len(subdirs), _MAX_WORKERS)) as executor:
+                for paths in executor.map(
+                        lambda subdir: list(self.__walk(subdir[0], suffix, subdir[1])), subdirs):
+                    files.extend(paths)
+
+        return files
+
+
+    def __write_list(self, filepath: str, paths: list) -> None:
+        """
+        Writes the list of paths to the specified file, one path per line.
+
+        Parameters:
+            - filepath: str
+                The file path to write the list.
+
+            - paths: list
+                The list of paths as bytes.
+
+        Returns:
+            None
+
+        Raises:
+            - ValueError
+                If the list is empty.
+
+            - PermissionError
+                If the file cannot be written by program.
+        """
+        if not paths:
+            Utils.raise_error(
+                ValueError('Contents cannot be empty'),
+                1, file=__file__
+            )
+
+        contents: bytes = _LINESEP.join(paths) + _LINESEP
+
+        # An unchanged list is not rewritten, only its modification time is
+        # updated, so Make still sees it newer than its prerequisites
+        try:
+            with open(filepath, 'rb') as file:
+                unchanged: bool = file.read() == contents
+            if unchanged:
+                os.utime(filepath)
+                if self.__verbose:
+                    Utils.info_msg(f'List in "{filepath}" is up-to-date.')
+                return
+        except OSError:
+            pass
+
+        if self.__verbose:
+            Utils.info_msg(f'Writing {len(paths)} paths to "{filepath}"...')
+
+        # The paths are written as they were read from the file system,
+        # straight to the file descriptor and without any decoding
+        remaining: memoryview = memoryview(contents)
+        try:
+            fd: int = os.open(filepath, _WRITE_FLAGS, 0o644)
             try:
-                msg = f'Unknown list type: "{generate}"'
-                raise ValueError(msg)
-            except ValueError as val_err:
-                Utils.raise_error(val_err, -1, file=__file__)
+                # A single write may be partial, write the rest until done
+                while remaining:
+                    remaining = remaining[os.write(fd, remaining):]
+            finally:
+                os.close(fd)
+        except PermissionError as perm_err:
+            Utils.raise_error(perm_err, -1, file=__file__)
+
+        if self.__verbose:
+            Utils.info_msg(f'List saved in "{filepath}".')
 
 
     def __generate_sources_list(self) -> None:
         """
         This method generates a list of source files from `src/main/java` directory.
-        The generated list is sorted and written back to `sourceFiles.lst` file.
+        The generated list is sorted and written to `sourceFiles.lst` file.
 
         Parameters:
             None
@@ -121,49 +280,33 @@ class GenerateList:
             None
 
         Raises:
-            None
+            - OSError
+                If the directory cannot be read.
         """
-        command = self.__command['unix']['source']
-
         if self.__verbose:
             Utils.pr_banner('GENERATING LIST')
             Utils.info_msg('Generating list...')
 
-        err_code: int = os.system(command)
+        source_lst: list = None
 
-        # Return if an error occured
-        if err_code != 0:
-            sys.exit(err_code)
-
-        if self.__verbose:
-            Utils.info_msg(
-                f'List generated, saved in "{self.__PATH["source"]}".'
-            )
-            Utils.pr_banner('SORT THE SOURCE LIST')
-            Utils.info_msg(
-                f'Sorting "{self.__PATH["source"].rsplit(os.sep, maxsplit=1)[-1]}"...'
-            )
-
-        source_lst: list = FileUtils.read_file(
-            self.__PATH['source'], verbose=self.__verbose
-        )
-
-        for idx, _ in enumerate(source_lst):
-            source_lst[idx] = source_lst[idx].strip()
-        source_lst.sort()
+        # Walk the source directory in-process, sorted before written
+        try:
+            source_lst = sorted(self.__collect(self.__SOURCE_ROOT, b'.java'))
+        except OSError as os_err:
+            Utils.raise_error(os_err, 2, file=__file__)
 
         if self.__verbose:
             Utils.info_msg('All list sorted.')
 
-        FileUtils.write_to_file(
-            self.__PATH['source'], contents=source_lst, verbose=self.__verbose
+        self.__write_list(
+            self.__PATH['source'], [self.__SOURCE_PREFIX + path for path in source_lst]
         )
 
 
     def __generate_output_list(self) -> None:
         """
         This method generates a list of class files from `target/classes/` directory.
-        The generated list is sorted and written back to `outputFiles.lst` file.
+        The generated list is sorted and written to `outputFiles.lst` file.
 
         Parameters:
             None
@@ -172,108 +315,76 @@ class GenerateList:
             None
 
         Raises:
-            None
+            - OSError
+                If the directory cannot be read.
         """
-        cmd = self.__command['unix']['output']
-
         if self.__verbose:
             Utils.pr_banner('GENERATING LIST')
             Utils.info_msg('Generating list...')
 
-        err_code: int = os.system(cmd)
-
-        # Return if an error occured
-        if err_code != 0:
-            sys.exit(err_code)
+        output_lst: list = None
 
-        if self.__verbose:
-            Utils.info_msg(
-                f'List generated, saved in "{self.__PATH["output"]}".'
-            )
-            Utils.pr_banner('SORT THE OUTPUT LIST')
-            Utils.info_msg(
-                f'Sorting "{self.__PATH["output"].rsplit(os.sep, maxsplit=1)[-1]}"...'
-            )
-
-        output_lst: list = FileUtils.read_file(
-            self.__PATH['output'], verbose=self.__verbose
-        )
-
-        new_output_lst: list = [ ]
-
-        for output_file in output_lst:
-            for out in output_file.split():
-                new_output_lst.append(os.path.join(*(out.split('/')[2:])))
-        new_output_lst.sort()
+        # Walk the classes directory in-process, the class files are
+        # listed relative to it and sorted before written
+        try:
+            output_lst = sorted(self.__collect(self.__CLASS_ROOT, b'.class'))
+        except OSError as os_err:
+            Utils.raise_error(os_err, 2, file=__file__)
 
         if self.__verbose:
             Utils.info_msg('All list sorted.')
 
-        FileUtils.write_to_file(
-            self.__PATH['output'], contents=new_output_lst, verbose=self.__verbose
-        )
+        self.__write_list(self.__PATH['output'], output_lst)
 
 
     __all__ = ['run']
 
 
 
+class _ArgumentParser(argparse.ArgumentParser):
+    """
+    Argument parser that reports invalid arguments
+      the same way as the other errors of this program.
+    """
+    def error(self, message: str) -> None:
+        Utils.raise_error(ValueError(message), 1, file=__file__)
+
+
+# Built once, the accepted options never change
+_PARSER = _ArgumentParser(
+    prog='generate_list.py',
+    description='Generates the list of source files or class files.'
+)
+_PARSER.add_argument(
+    'target', choices=tuple(_LIST_OPTS),
+    help='the type of list to generate'
+)
+_PARSER.add_argument(
+    'verbose_word', nargs='?', choices=('verbose',), metavar='verbose',
+    help='same as --verbose'
+)
+_PARSER.add_argument(
+    '-v', '--verbose', action='store_true',
+    help='print verbose output'
+)
+
+
 def main() -> None:
     """
     Main program.
     """
-    def check_opt(opt: str, *args) -> bool:
-        result: bool = False
-
-        if len(args) == 1 and args[0] == 1:
-            result = any(opt in option for option in opts_arg[args[0]])
-        elif len(args) == 1 and args[0] == 0:
-            result = opt in opts_arg[0]
-        elif len(args) == 2 and args[0] == 1:
-            result = opt in opts_arg[args[0]][args[1]]
-
-        return result
-
-    # -------------------------------------------------------- #
-
-    opts_arg: list  = [
-        ('-v', '--verbose', 'verbose'),
-        [
-            ('src', 'source'),
-            ('cls', 'class')
-        ]
-    ]
-
-    # Checking the CLI arguments
-    try:
-        if len(sys.argv) > 3:
-            raise RuntimeError('Too many arguments, need (1 or 2) arguments')
-        if len(sys.argv) == 2 and not check_opt(sys.argv[1], 1):
-            raise ValueError(f'Unknown options value: "{sys.argv[1]}"')
-        if len(sys.argv) == 3 and not (check_opt(sys.argv[1], 1) or check_opt(sys.argv[2], 0)):
-            raise ValueError(f'Unknown options value: "{sys.argv[1]}" + "{sys.argv[2]}"')
-    except ValueError as value_err:
-        Utils.raise_error(value_err, 1, file=__file__)
-    except RuntimeError as run_err:
-        Utils.raise_error(run_err, -1, file=__file__)
+    if len(sys.argv) > 3:
+        Utils.raise_error(
+            RuntimeError('Too many arguments, need (1 or 2) arguments'),
+            -1, file=__file__
+        )
+
+    args: argparse.Namespace = _PARSER.parse_args()
 
     # Run the GenerateList program
-    if len(sys.argv) == 2 and \
-            (check_opt(sys.argv[1], 1) and check_opt(sys.argv[1], 1, 0)):
-        GenerateList().run(generate='source_list')
-    elif len(sys.argv) == 2 and \
-            (check_opt(sys.argv[1], 1) and check_opt(sys.argv[1], 1, 1)):
-        GenerateList().run(generate='output_list')
-    elif len(sys.argv) == 3 and (check_opt(sys.argv[1], 1) and check_opt(sys.argv[2], 0)):
-        if check_opt(sys.argv[1], 1, 0):
-            GenerateList(verbose=True).run(generate='source_list')
-        elif check_opt(sys.argv[1], 1, 1):
-            GenerateList(verbose=True).run(generate='output_list')
-    else:
-        try:
-            raise ValueError(f'Unknown options value: "{sys.argv[1]}" "{sys.argv[2]}"')
-        except ValueError as value_err:
-            Utils.raise_error(value_err, 1, file=__file__)
+    GenerateList(verbose=args.verbose or args.verbose_word is not None).run(
+        generate=_LIST_OPTS[args.target]
+    )
 
 
 ## === DRIVER === ##
@@ -7,14 +7,52 @@ __all__ = ['Utils', 'FileUtils']
 import os
 import sys
 import json
-from typing import Optional, Union
-from traceback import extract_stack
-
-try:
+import stat
+from typing import TYPE_CHECKING, Optional, Union, Iterator, Iterable
+from inspect import currentframe
+from traceback import StackSummary, walk_stack
+
+# Frequently used names of the `os` module, bound once for the whole module
+_SEP = os.sep
+_LS  = os.linesep
+
+# Decorations of the error report printed by `Utils.raise_error`
+_ERR_HEADER = '>' * 9
+_ERR_FOOTER = '<' * 9
+_TB_HEADER  = '>' * 13
+_TB_INDENT  = '>' * 4 + ' ' * 6
+
+# BeautifulSoup and lxml are imported lazily by `Utils.convert_to_bs`
+# and `Utils.iter_xml`
+if TYPE_CHECKING:
     from bs4 import BeautifulSoup
-except ModuleNotFoundError as bs_not_found:
-    print('[jmatrix] Please install all the requirements first.')
-    raise bs_not_found
+    from lxml import etree
+
+# Generic BeautifulSoup parser types, mapped to the C-backed lxml parsers
+_BS_PARSERS: dict = {
+    'xml':  'lxml-xml',
+    'html': 'lxml'
+}
+
+def _stat(path: str) -> tuple:
+    """
+    Return whether the given path exists and whether it is a directory,
+    both answered by a single `stat` call.
+    """
+    try:
+        st_mode = os.stat(path).st_mode
+    except (OSError, ValueError):
+        return (False, False)
+    return (True, stat.S_ISDIR(st_mode))
+
+
+# Serializers used by `FileUtils.write_to_file`, keyed by the contents type.
+# Each one returns the whole text, so it can be written with a single call.
+_SERIALIZERS: dict = {
+    list: lambda contents, newline: newline.join(contents) + newline,
+    str:  lambda contents, newline: contents + newline,
+    dict: lambda contents, newline: json.dumps(contents, indent=4) + newline
+}
 
 
 class Utils:
@@ -45,40 +83,40 @@ class Utils:
         Raises:
             None
         """
-        if file is not None and len(file.split(os.sep)) != 1:
-            file = file.split(os.sep)[-1]
-
-        sys.stderr.write(
-            os.linesep + \
-            fr'/!\ ERROR{os.linesep}{">"*9}{os.linesep}'
-        )
-
         if file is not None:
-            sys.stderr.write(f'[jmatrix] An error occured in "{file}".{os.linesep}')
-        else:
-            sys.stderr.write(f'[jmatrix] An error occured.{os.linesep}')
-
-        sys.stderr.write(f"{'>'*9} {ex} {'<'*9}{os.linesep*2}")
+            file = os.path.basename(file)
 
-        tb_stack = extract_stack()
-        tb_stack.pop(-1)
-
-        sys.stderr.write(fr'/!\ TRACEBACK{os.linesep}{">"*13}{os.linesep}')
-        for frame in tb_stack:
-            sys.stderr.write(
-                f'File "...{os.sep}' + \
-                f'{(os.sep).join(frame.filename.split(os.sep)[-4:])}"{os.linesep}'
-            )
-            sys.stderr.write(
-                '>' * 4 + ' ' * 6 + \
-                f'at "{frame.name}", line {frame.lineno}' + \
-                f'{os.linesep * 2 if tb_stack.index(frame) != len(tb_stack) - 1 else os.linesep}'
+        # Start from the caller, so this function is not part of the traceback.
+        # Only the file names and line numbers are shown, no source lines needed.
+        tb_stack = StackSummary.extract(
+            walk_stack(currentframe().f_back), lookup_lines=False
+        )
+        tb_stack.reverse()  # Outermost frame first
+
+        # The whole report is built first and written at once
+        report: list = [
+            fr'{_LS}/!\ ERROR{_LS}{_ERR_HEADER}{_LS}',
+            f'[jmatrix] An error occured in "{file}".{_LS}' if file is not None \
+                else f'[jmatrix] An error occured.{_LS}',
+            f'{_ERR_HEADER} {ex} {_ERR_FOOTER}{_LS * 2}',
+            fr'/!\ TRACEBACK{_LS}{_TB_HEADER}{_LS}'
+        ]
+
+        last: int = len(tb_stack) - 1
+        for idx, frame in enumerate(tb_stack):
+            # Only the last four path components are shown
+            filename: str = _SEP.join(frame.filename.rsplit(_SEP, 4)[-4:])
+            report.append(f'File "...{_SEP}{filename}"{_LS}')
+            report.append(
+                f'{_TB_INDENT}at "{frame.name}", line {frame.lineno}' + \
+                f'{_LS * 2 if idx != last else _LS}'
             )
 
-            if tb_stack.index(frame) == len(tb_stack) - 1:
-                sys.stderr.write(f'{type(ex).__name__}: {ex}{os.linesep}')
+            if idx == last:
+                report.append(f'{type(ex).__name__}: {ex}{_LS}')
 
-        sys.stderr.write(f'{os.linesep}Exited with error code: {status}{os.linesep}')
+        report.append(f'{_LS}Exited with error code: {status}{_LS}')
+        sys.stderr.write(''.join(report))
 
         if status != 0:
             sys.exit(status)
@@ -107,7 +145,32 @@ class Utils:
 
 
     @staticmethod
-    def convert_to_bs(filepath: str, _type: str = 'xml', verbose: bool = False) -> BeautifulSoup:
+    def info_msgs(messages: Iterable[str], prefix: str = 'jmatrix') -> None:
+        """
+        Print all the messages to standard output (stdout) in one write,
+          each one on its own line with specified prefix.
+
+        Parameters:
+            - messages: Iterable[str]
+                The strings that want to be printed.
+
+            - prefix: str (default = 'jmatrix')
+                A string that specifies prefix.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        lines: list = [f'[{prefix}] {message}' for message in messages]
+        if lines:
+            print(_LS.join(lines))
+
+
+    @staticmethod
+    def convert_to_bs(filepath: str,
+            _type: str = 'lxml-xml', verbose: bool = False) -> 'BeautifulSoup':
         """
         Takes a file path as input and returns the contents of
           the file in BeautifulSoup object form.
@@ -116,8 +179,10 @@ class Utils:
             - filepath: str
                 The file path of the file to be parsed.
 
-            - _type: str (default = 'xml')
+            - _type: str (default = 'lxml-xml')
                 The type of parser to be used.
+                Use 'lxml' for HTML documents, the generic 'xml' and 'html'
+                  types are also mapped to these parsers.
 
             - verbose: bool (default = False)
                 A boolean value that specifies whether
@@ -127,14 +192,70 @@ class Utils:
             A `BeautifulSoup` object containing the contents of the file.
 
         Raises:
-            None
+            - ModuleNotFoundError
+                If the `bs4` package is not installed.
         """
+        # Imported here, so programs that never use this method
+        # do not pay the import cost of BeautifulSoup
+        try:
+            from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+        except ModuleNotFoundError as bs_not_found:
+            Utils.info_msg('Please install all the requirements first.')
+            raise bs_not_found
+
         contents: str = FileUtils.read_file(filepath, _list=False, verbose=verbose)
 
         if verbose:
             Utils.info_msg('Contents converted to \'BeautifulSoup\' object.')
 
-        return BeautifulSoup(contents, _type)
+        return BeautifulSoup(contents, _BS_PARSERS.get(_type, _type))
+
+
+    @staticmethod
+    def iter_xml(filepath: str, tag: Union[str, tuple] = None) -> Iterator['etree._Element']:
+        """
+        Parses the XML file incrementally and yields its elements
+          as soon as they are complete, without building the whole tree.
+        Every yielded element is cleared once the next one is requested,
+          so only the element being processed is kept in memory.
+
+        Parameters:
+            - filepath: str
+                The file path of the XML file to be parsed.
+
+            - tag: Union[str, tuple] (default = None)
+                The tag name or a tuple of tag names to be yielded,
+                  use '{*}name' to match the name in any namespace.
+                If None, all elements are yielded.
+
+        Returns:
+            An iterator of the matched elements.
+
+        Raises:
+            - ModuleNotFoundError
+                If the `lxml` package is not installed.
+
+            - lxml.etree.XMLSyntaxError
+                If the file is not a well-formed XML document.
+        """
+        # Imported here, so programs that never use this method
+        # do not pay the import cost of lxml
+        try:
+            from lxml import etree  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        except ModuleNotFoundError as lxml_not_found:
+            Utils.info_msg('Please install all the requirements first.')
+            raise lxml_not_found
+
+        with open(filepath, 'rb') as file:
+            for _, element in etree.iterparse(file, events=('end',), tag=tag):
+                yield element
+
+                element.clear()
+                # Drop the already processed siblings still referenced by the parent
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
 
 
     @staticmethod
@@ -152,14 +273,16 @@ class Utils:
         Raises:
             None
         """
-        print(os.linesep * kwargs.get('newline', 2) + \
-            '-' * kwargs.get('lines', 80))
-        print(f'>>> [ {title} ] <<< '.center(kwargs.get('center', 78)))
-        print('-' * kwargs.get('lines', 80))
+        line: str = '-' * kwargs.get('lines', 80)
+        print(
+            _LS * kwargs.get('newline', 2) + line + _LS + \
+            f'>>> [ {title} ] <<< '.center(kwargs.get('center', 78)) + _LS + \
+            line
+        )
 
 
     # List all of public methods, it can be imported all with wildcard '*'
-    __all__ = ['check_directory', 'check_file', 'read_file', 'write_to_file', 'pr_banner']
+    __all__ = ['raise_error', 'info_msg', 'info_msgs', 'convert_to_bs', 'iter_xml', 'pr_banner']
 
 
 
@@ -173,6 +296,7 @@ class FileUtils:
     def check_directory(dirpath: str, verbose: bool = False) -> None:
         """
         Check if a directory exists and create it if it does not exists.
+        The program exits with an error if the path exists but is not a directory.
 
         Parameters:
             - dirpath: str
@@ -192,17 +316,23 @@ class FileUtils:
                 'CHECK DIRECTORY', lines=40, center=39, newline=1
             )
             Utils.info_msg(f'Checking directory "{dirpath}"...')
-        if not os.path.exists(dirpath):
-            if verbose:
-                Utils.info_msg('Given directory path does not exist.')
-                Utils.info_msg(f'Creating new directory (\'{dirpath}\')...')
+
+        # Try to create the directory right away instead of checking
+        # its existence first, an existing directory is not an error
+        created: bool = True
+        try:
             os.makedirs(dirpath)
-            if verbose:
+        except FileExistsError as exists_err:
+            if not _stat(dirpath)[1]:
+                Utils.raise_error(exists_err, 2, file=__file__)
+            created = False
+
+        if verbose:
+            if created:
+                Utils.info_msg('Given directory path does not exist.')
                 Utils.info_msg(f'Successfully create "{dirpath}" directory.')
-        else:
-            if verbose:
+            else:
                 Utils.info_msg(f'"{dirpath}" directory is already exist.')
-        if verbose:
             Utils.pr_banner(
                 '(END) CHECK DIRECTORY',
                 lines=40, center=39, newline=0
@@ -235,12 +365,12 @@ class FileUtils:
             )
             Utils.info_msg(f'Check existence for file: "{filepath}"...')
 
-        if os.path.exists(filepath):
+        if _stat(filepath)[0]:
             if verbose:
                 Utils.info_msg(f'File "{filepath}" is exist.')
             return
 
-        Utils.info_msg(f'File "{filepath}" does not exist, error raised!' + os.linesep)
+        Utils.info_msg(f'File "{filepath}" does not exist, error raised!' + _LS)
         try:
             msg = f'File "{filepath}" does not exist or cannot be accessed'
             raise FileNotFoundError(msg)
@@ -299,15 +429,13 @@ class FileUtils:
             if filepath is None:
                 msg = 'File path cannot be empty'
                 raise ValueError(msg)
-            if not os.path.exists(filepath):
+            if not _stat(filepath)[0]:
                 msg = f'File "{filepath}" does not exist or cannot be accessed'
                 raise FileNotFoundError(msg)
 
-            with open(filepath, 'r', encoding='utf-8') as file:
-                if _list:
-                    contents = file.readlines()
-                else:
-                    contents = file.read()
+            # Read the raw bytes and decode them at once
+            with open(filepath, 'rb') as file:
+                contents = file.read().decode('utf-8')
         except ValueError as empty_path:
             Utils.raise_error(empty_path, 1, file=__file__)
         except FileNotFoundError as file_not_found:
@@ -315,6 +443,18 @@ class FileUtils:
         except PermissionError as perm_err:
             Utils.raise_error(perm_err, -1, file=__file__)
 
+        # Translate the newlines the same way as reading in text mode
+        if '\r' in contents:
+            contents = contents.replace('\r\n', '\n').replace('\r', '\n')
+
+        # Split on '\n' only, `str.splitlines` would also split on
+        # other characters such as form feeds, unlike `readlines`
+        if _list:
+            lines: list = contents.split('\n')
+            contents = [line + '\n' for line in lines[:-1]]
+            if lines[-1]:
+                contents.append(lines[-1])
+
         if verbose:
             Utils.info_msg('Successfully retrieve all contents.')
             Utils.pr_banner(
@@ -378,7 +518,7 @@ class FileUtils:
                 if not contents:
                     msg = 'Contents cannot be empty'
                     raise ValueError(msg)
-                if os.path.exists(filepath) and os.path.isdir(filepath):
+                if _stat(filepath)[1]:
                     msg = 'Given file path is a directory'
                     raise IsADirectoryError(msg)
                 if not isinstance(contents, (list, dict, str)):
@@ -395,12 +535,12 @@ class FileUtils:
         def pr_msg(message: str, *args) -> None:
             if not verbose:
                 return
-            if len(args) == 0 or args is None:
+            if args and isinstance(args[0], dict):
+                Utils.info_msgs(
+                    message.format(key=key, val=val) for key, val in args[0].items()
+                )
+            else:
                 Utils.info_msg(message)
-            elif len(args) != 0 and isinstance(args[0], dict):
-                for key, val in args[0].items():
-                    message.format(key=key, val=val)
-                    Utils.info_msg(message)
 
         # -------------------------------------------------- #
 
@@ -409,7 +549,7 @@ class FileUtils:
         )
 
         if kwargs.get('newline', True):
-            newline = os.linesep
+            newline = _LS
         else:
             newline = ''
 
@@ -421,21 +561,26 @@ class FileUtils:
                 f'Writing contents id:<{id(contents)}> to "{filepath}"...'
             )
 
+        # Subclasses of the supported types fall back to an `isinstance` lookup
+        serialize = _SERIALIZERS.get(type(contents)) or next(
+            func for _type, func in _SERIALIZERS.items() if isinstance(contents, _type)
+        )
+
         try:
             with open(filepath, 'w', encoding='utf-8') as file:
+                file.write(serialize(contents, newline))
+
+            if verbose:
                 if isinstance(contents, list):
-                    for content in contents:
-                        file.write(content + newline)
-                        pr_msg(
-                            f'Writing "{content.strip()}" -> \'{filepath}\'...'
-                        )
+                    Utils.info_msgs(
+                        f'Writing "{content.strip()}" -> \'{filepath}\'...'
+                            for content in contents
+                    )
                 elif isinstance(contents, str):
                     pr_msg(f'Writing "{contents}" -> \'{filepath}\'...')
-                    file.write(contents + newline)
-                elif isinstance(contents, dict):
-                    file.write(json.dumps(contents, indent=4) + newline)
+                else:
                     pr_msg(
-                        'Writing ("{key}", "{val}") ->' + f'\'{filepath}\'...',
+                        'Writing ("{key}", "{val}") -> ' + f'\'{filepath}\'...',
                         contents
                     )
 
@@ -454,4 +599,4 @@ class FileUtils:
 
 
     # List all of public methods, it can be imported all with wildcard '*'
-    __all__ = ['raise_error', 'info_msg', 'convert_to_bs']
+    __all__ = ['check_directory', 'check_file', 'read_file', 'write_to_file']